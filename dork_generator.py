@@ -6,74 +6,689 @@ Optimized Google Dork Generator v2.0
 """
 
 import os
+import io
+import sys
 import glob
 import re
 import json
-from collections import Counter, defaultdict
+import math
+import heapq
+import hashlib
+import base64
+import itertools
+import shutil
+import tempfile
+import threading
+import time
+import concurrent.futures
+from collections import Counter, OrderedDict, defaultdict, deque, namedtuple
 import warnings
 warnings.filterwarnings('ignore')
 
+# Corpus files: plain text/markdown, optionally compressed (e.g. packed shards)
+CORPUS_EXTENSIONS = ('.txt', '.md')
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+
+# Rough per-entry cost of a str held in a set (hash slot + pointer + slack)
+SET_ENTRY_OVERHEAD = 64
+# Maximum number of sorted runs merged in a single k-way pass
+MERGE_FAN_IN = 64
+
+# Consistent view of the corpus handed to a single query
+CorpusSnapshot = namedtuple('CorpusSnapshot', 'dorks keyword_index operator_index index tfidf generation')
+
+# Query taxonomy shipped next to this module, and the built-in fallback
+TAXONOMY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'taxonomy.json')
+DEFAULT_TAXONOMY = {
+    'technology': {
+        'wordpress': ['wp'],
+        'joomla': [],
+        'sql': ['mysql', 'database', 'db'],
+        'php': []
+    },
+    'target': {
+        'config': ['configuration'],
+        'login': ['admin'],
+        'backup': ['dump'],
+        'password': ['passwd'],
+        'database': ['db']
+    },
+    'filetype': {
+        'sql': [],
+        'php': [],
+        'env': [],
+        'log': []
+    }
+}
+# Number of parsed queries memoized per generator
+QUERY_CACHE_SIZE = 4096
+# First FAISS window fetched by the lazy semantic iterator (doubles as needed)
+SEMANTIC_WINDOW = 64
+
+# Deadline-aware search: ranking stages and how their latencies are tracked
+SEARCH_STAGES = {'s': 'semantic', 't': 'tfidf', 'k': 'keyword'}
+SEARCH_STAGE_WORKERS = 8   # stage threads, two per deadline-bound request in flight
+LATENCY_SAMPLES = 2048     # recent latencies kept per stage for percentiles
+
+# Hardware tuning written by setup_wizard.py, read from the data directory
+TUNING_FILE_NAME = 'tuning.json'
+DEFAULT_TUNING = {
+    'batch_size': 32,
+    'threads': None,
+    'index_type': 'flat',
+    'semantic': True
+}
+# Neighbours per node for the approximate (HNSW) vector index
+HNSW_NEIGHBORS = 32
+
+# Term co-occurrence table used to expand fast-mode queries
+COOCCUR_FILE_NAME = 'dorks_cooccur.json'
+COOCCUR_MIN_COUNT = 3      # pairs seen fewer times are noise
+COOCCUR_MIN_NPMI = 0.3     # minimum normalized PMI for a related term
+COOCCUR_TOP_K = 8          # related terms kept per term
+COOCCUR_MAX_TERMS = 12     # terms per dork considered for pairs
+EXPANSION_BUDGET = 6       # expansion terms added per query
+EXPANSION_PER_TERM = 3     # expansion terms taken from each query word
+RARITY_BONUS_MAX = 4       # extra points for matching a rare query word
+COOCCUR_IGNORE = {
+    'inurl', 'intitle', 'intext', 'filetype', 'site', 'ext', 'allinurl', 'allintitle',
+    'allintext', 'index', 'www', 'http', 'https', 'com', 'the', 'and', 'for', 'with',
+    'your', 'you', 'please', 'enter', 'this', 'that', 'from', 'are', 'not', 'all'
+}
+
+def find_corpus_files(data_dir):
+    """List corpus files in a data directory, plain or compressed"""
+    files = []
+    for ext in CORPUS_EXTENSIONS:
+        for suffix in ('',) + COMPRESSED_SUFFIXES:
+            files.extend(glob.glob(os.path.join(data_dir, '*' + ext + suffix)))
+    return files
+
+def open_corpus_file(path):
+    """Open a corpus file as a text stream, decompressing on the fly by suffix
+    
+    Iterating the result yields lines as they are decompressed, so nothing
+    is materialised in memory or on disk. .zst needs Python 3.14's
+    compression.zstd or the zstandard package.
+    """
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf-8', errors='ignore')
+    if path.endswith('.bz2'):
+        import bz2
+        return bz2.open(path, 'rt', encoding='utf-8', errors='ignore')
+    if path.endswith('.xz'):
+        import lzma
+        return lzma.open(path, 'rt', encoding='utf-8', errors='ignore')
+    if path.endswith('.zst'):
+        try:
+            from compression import zstd
+            return zstd.open(path, 'rt', encoding='utf-8', errors='ignore')
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("reading .zst files needs the zstandard package (pip install zstandard)")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                       closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8', errors='ignore')
+    return open(path, 'r', encoding='utf-8', errors='ignore')
+
+def load_tuning(data_dir):
+    """Read the tuning file of a data directory, filling in defaults"""
+    tuning = dict(DEFAULT_TUNING)
+    path = os.path.join(data_dir, TUNING_FILE_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tuning.update({k: v for k, v in json.load(f).items() if k in DEFAULT_TUNING})
+            print(f"⚙️ Using tuned config: batch={tuning['batch_size']}, "
+                  f"threads={tuning['threads']}, index={tuning['index_type']}, "
+                  f"semantic={tuning['semantic']}")
+        except Exception as e:
+            print(f"⚠️ Ignoring invalid {TUNING_FILE_NAME}: {e}")
+    return tuning
+
+def set_thread_count(threads):
+    """Apply a thread count to torch and FAISS when they are installed"""
+    if not threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    try:
+        import faiss
+        faiss.omp_set_num_threads(threads)
+    except Exception:
+        pass
+
+def build_vector_index(embeddings, index_type='flat'):
+    """Build an inner-product FAISS index: exact ('flat') or approximate ('hnsw')"""
+    import faiss
+    
+    dim = embeddings.shape[1]
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+    index.add(embeddings.astype('float32'))
+    return index
+
+def build_cooccurrence(dorks):
+    """Build {term: [[related, npmi], ...]} from terms sharing a dork
+    
+    Related terms are ranked by NPMI weighted with the log of the pair
+    count, so rare coincidences do not crowd out well-supported pairs.
+    """
+    doc_freq = Counter()
+    pair_freq = Counter()
+    for dork in dorks:
+        terms = sorted({w for w in re.findall(r'\b\w+\b', dork.lower())
+                        if len(w) > 2 and not w.isdigit() and w not in COOCCUR_IGNORE})
+        terms = terms[:COOCCUR_MAX_TERMS]
+        doc_freq.update(terms)
+        pair_freq.update(itertools.combinations(terms, 2))
+    
+    total = len(dorks)
+    related = defaultdict(list)
+    for (a, b), count in pair_freq.items():
+        if count < COOCCUR_MIN_COUNT or count == total:
+            continue
+        npmi = math.log(count * total / (doc_freq[a] * doc_freq[b])) / -math.log(count / total)
+        if npmi < COOCCUR_MIN_NPMI:
+            continue
+        rank = npmi * math.log(count)
+        related[a].append((rank, b, npmi))
+        related[b].append((rank, a, npmi))
+    
+    return {
+        term: [[other, round(npmi, 3)] for _, other, npmi in sorted(pairs, reverse=True)[:COOCCUR_TOP_K]]
+        for term, pairs in related.items()
+    }
+
+# Sparse TF-IDF ranking backend (scikit-learn)
+# Matrix as scipy .npz, vocabularies and IDF weights as JSON: no pickle to load
+TFIDF_MATRIX_FILE_NAME = 'dorks_tfidf.npz'
+TFIDF_VOCAB_FILE_NAME = 'dorks_tfidf.json'
+TFIDF_CHUNK = 256          # queries scored per dense block in batch mode
+
+class TfidfRanker:
+    """Sparse TF-IDF ranking over word and character n-grams
+    
+    The corpus is vectorized once into an L2-normalized CSR matrix; a batch
+    of queries is scored with a single sparse product and the top k per
+    query picked with ``argpartition``.
+    """
+    
+    def __init__(self, word_vectorizer, char_vectorizer, matrix):
+        self.word_vectorizer = word_vectorizer
+        self.char_vectorizer = char_vectorizer
+        self.matrix = matrix
+        self.matrix_t = matrix.T.tocsr()
+    
+    @staticmethod
+    def _vectorizers():
+        """Unfitted (word, char) vectorizers; fit and load must agree on these"""
+        import numpy as np
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        word_vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), lowercase=True,
+                                          token_pattern=r'(?u)\b\w+\b', sublinear_tf=True,
+                                          dtype=np.float32)
+        char_vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), lowercase=True,
+                                          min_df=2, sublinear_tf=True, dtype=np.float32)
+        return word_vectorizer, char_vectorizer
+    
+    @classmethod
+    def fit(cls, dorks):
+        """Vectorize the corpus (raises ImportError without scikit-learn)"""
+        word_vectorizer, char_vectorizer = cls._vectorizers()
+        matrix = cls._stack(word_vectorizer.fit_transform(dorks),
+                            char_vectorizer.fit_transform(dorks))
+        
+        # Only kept for introspection, and large
+        for vectorizer in (word_vectorizer, char_vectorizer):
+            if hasattr(vectorizer, 'stop_words_'):
+                delattr(vectorizer, 'stop_words_')
+        
+        return cls(word_vectorizer, char_vectorizer, matrix)
+    
+    def save(self, matrix_file, vocab_file, signature):
+        """Write the matrix as .npz and the fitted vocabularies as JSON
+        
+        The JSON, which carries the corpus signature, is written last, so a
+        failed matrix write never leaves a matching signature behind.
+        """
+        from scipy.sparse import save_npz
+        
+        save_npz(matrix_file, self.matrix)
+        fitted = {}
+        for name, vectorizer in (('word', self.word_vectorizer), ('char', self.char_vectorizer)):
+            fitted[name] = {
+                'vocabulary': {term: int(i) for term, i in vectorizer.vocabulary_.items()},
+                'idf': [float(weight) for weight in vectorizer.idf_]
+            }
+        with open(vocab_file, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, **fitted}, f)
+    
+    @classmethod
+    def load(cls, matrix_file, vocab_file, signature):
+        """Ranker saved for this corpus signature, or None if stale or mismatched"""
+        import numpy as np
+        from scipy.sparse import load_npz
+        
+        with open(vocab_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('signature') != signature:
+            return None
+        
+        vectorizers = cls._vectorizers()
+        for name, vectorizer in zip(('word', 'char'), vectorizers):
+            vectorizer.vocabulary_ = data[name]['vocabulary']
+            vectorizer.idf_ = np.asarray(data[name]['idf'], dtype=np.float32)
+        
+        matrix = load_npz(matrix_file).tocsr()
+        features = sum(len(vectorizer.vocabulary_) for vectorizer in vectorizers)
+        if matrix.shape[1] != features:
+            return None
+        return cls(*vectorizers, matrix)
+    
+    @staticmethod
+    def _stack(word_part, char_part):
+        from scipy.sparse import hstack
+        from sklearn.preprocessing import normalize
+        return normalize(hstack([word_part, char_part], format='csr'))
+    
+    def transform(self, texts):
+        """Vectorize texts into the corpus feature space"""
+        return self._stack(self.word_vectorizer.transform(texts),
+                           self.char_vectorizer.transform(texts))
+    
+    def scores(self, query):
+        """Non-zero (indices, scores) of one query against the corpus"""
+        row = (self.transform([query]) @ self.matrix_t).tocsr()
+        return row.indices, row.data
+    
+    def top_k_batch(self, queries, top_k):
+        """Top-k corpus indices per query, best first
+        
+        Ranked exactly like the single-query path: matches by score with
+        ties broken by index, then unmatched dorks padded in corpus order.
+        """
+        import numpy as np
+        
+        results = []
+        n = self.matrix.shape[0]
+        k = min(top_k, n)
+        if k <= 0:
+            return [[] for _ in queries]
+        
+        for start in range(0, len(queries), TFIDF_CHUNK):
+            block = (self.transform(queries[start:start + TFIDF_CHUNK]) @ self.matrix_t).tocsr()
+            block.sort_indices()
+            for row in range(block.shape[0]):
+                begin, end = block.indptr[row], block.indptr[row + 1]
+                indices, scores = block.indices[begin:end], block.data[begin:end]
+                if len(indices) > k:
+                    # k best by score; at the cut keep the lowest indices, like the heap
+                    threshold = -np.partition(-scores, k - 1)[k - 1]
+                    above = scores > threshold
+                    ties = np.flatnonzero(scores == threshold)[:k - int(above.sum())]
+                    keep = np.concatenate([np.flatnonzero(above), ties])
+                    indices, scores = indices[keep], scores[keep]
+                ranked = indices[np.lexsort((indices, -scores))].tolist()
+                
+                if len(ranked) < k:
+                    matched = set(ranked)
+                    ranked.extend(itertools.islice((idx for idx in range(n) if idx not in matched),
+                                                   k - len(ranked)))
+                results.append(ranked)
+        return results
+    
+    def updated(self, removed_ids, added):
+        """New ranker with rows removed and added dorks vectorized in place
+        
+        The vocabulary and IDF weights stay those of the original fit.
+        """
+        import numpy as np
+        from scipy.sparse import vstack
+        
+        matrix = self.matrix
+        if removed_ids:
+            keep = np.ones(matrix.shape[0], dtype=bool)
+            keep[removed_ids] = False
+            matrix = matrix[keep]
+        if added:
+            matrix = vstack([matrix, self.transform(added)], format='csr')
+        return TfidfRanker(self.word_vectorizer, self.char_vectorizer, matrix)
+
+def _tokenize(text):
+    """Lowercase word tokens shared by the taxonomy and the queries"""
+    return re.findall(r'\w+', text.lower())
+
+def _succeeded(future):
+    """True once a stage future has finished without raising"""
+    return future.done() and not future.cancelled() and future.exception() is None
+
+def _singular(word):
+    """Crude English singular of a query word (databases -> database)"""
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'xes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def singular_token(word):
+    """Singular a query word also matches as a whole dork token, or None
+    
+    Only whole tokens are matched (keyword_index postings), never substrings,
+    so 'logs' picks up 'log' but not every 'login'; stems shorter than the
+    indexed minimum ('aws' -> 'aw') are dropped.
+    """
+    singular = _singular(word)
+    if singular == word or len(singular) <= 2:
+        return None
+    return singular
+
+def word_weight(matches, total):
+    """Score of a literal query-word match matching `matches` of `total` dorks
+    
+    10 plus a rarity bonus (log10 of the inverse match fraction, capped), so
+    in 'exposed databases' the few database dorks outrank 'site:exposed'.
+    """
+    if not matches:
+        return 10
+    return 10 + min(RARITY_BONUS_MAX, int(math.log10(total / matches)))
+
+class QueryTaxonomy:
+    """Alias lookup compiled once from a taxonomy mapping
+    
+    Every alias is tokenized into a tuple and stored in a single dict, so
+    matching a query costs one hash lookup per n-gram of the query no matter
+    how many technologies, targets or filetypes the taxonomy holds.
+    """
+    
+    def __init__(self, taxonomy):
+        self.categories = list(taxonomy)
+        self.lookup = defaultdict(list)
+        self.max_ngram = 1
+        
+        for category, entries in taxonomy.items():
+            for rank, (canonical, aliases) in enumerate(entries.items()):
+                for alias in [canonical, *aliases]:
+                    key = tuple(_tokenize(alias))
+                    if not key:
+                        continue
+                    hit = (category, rank, canonical)
+                    if hit not in self.lookup[key]:
+                        self.lookup[key].append(hit)
+                    self.max_ngram = max(self.max_ngram, len(key))
+        
+        self.lookup = dict(self.lookup)
+    
+    @classmethod
+    def load(cls, path=TAXONOMY_FILE):
+        """Load the taxonomy file, falling back to the built-in maps"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except Exception as e:
+            print(f"⚠️ Could not load taxonomy ({e}), using built-in maps")
+            return cls(DEFAULT_TAXONOMY)
+    
+    def match(self, *token_lists):
+        """Map token lists to {category: [canonical, ...]} in taxonomy order"""
+        found = {category: {} for category in self.categories}
+        
+        for tokens in token_lists:
+            for i in range(len(tokens)):
+                for n in range(min(self.max_ngram, len(tokens) - i), 0, -1):
+                    key = tuple(tokens[i:i + n])
+                    hits = self.lookup.get(key, [])
+                    # Cheap plural folding for single words (backups -> backup)
+                    if n == 1 and len(key[0]) > 3 and key[0].endswith('s'):
+                        hits = hits + self.lookup.get((key[0][:-1],), [])
+                    for category, rank, canonical in hits:
+                        found[category].setdefault(canonical, rank)
+        
+        return {category: sorted(hits, key=hits.get) for category, hits in found.items()}
+
 class DorkGenerator:
-    def __init__(self, data_dir="data", use_ai=True):
+    def __init__(self, data_dir="data", use_ai=True, ingest_buffer=None, use_tfidf=False, wait=True):
+        self._init_state(data_dir, use_ai, ingest_buffer)
+        
+        # Startup runs as a dependency graph: model loading overlaps corpus I/O
+        # and keyword indexing on background threads, and fast-mode queries are
+        # servable as soon as the 'keyword' stage is done
+        self._stages.update({name: threading.Event() for name in ('corpus', 'keyword')})
+        if use_ai:
+            self._start_stage('encoder', self._load_encoder)
+            self._start_stage('vector_lib', self._import_vector_lib)
+            self._start_stage('nlp', self._load_nlp)
+            self._start_stage('semantic', self._build_semantic_index,
+                              after=('corpus', 'encoder', 'vector_lib'))
+        if use_tfidf:
+            # Vectorizing is GIL-bound, so let it trail keyword indexing
+            self._start_stage('tfidf', self._init_tfidf, after=('keyword',))
+        
+        # Load dorks
+        print("📂 Loading dork database...")
+        self.load_all_dorks()
+        self._finish_stage('corpus')
+        
+        # Build indices
+        print("🔨 Building search indices...")
+        self.build_fast_indices()
+        self._finish_stage('keyword')
+        print(f"✓ Keyword search ready in {self.startup_timings['keyword']:.2f}s")
+        
+        if wait:
+            self.wait_until_ready()
+    
+    def _init_state(self, data_dir, use_ai=True, ingest_buffer=None, tuning=None, taxonomy=None):
+        """Set up the attributes every generator needs, before any corpus is loaded"""
         self.data_dir = data_dir
         self.use_ai = use_ai
+        self.ingest_buffer = ingest_buffer
         self.cache_file = os.path.join(data_dir, 'dorks_cache.json')
+        self.lines_cache_file = os.path.join(data_dir, 'dorks_cache.lines')
+        self.cooccur_file = os.path.join(data_dir, COOCCUR_FILE_NAME)
+        self.tfidf_matrix_file = os.path.join(data_dir, TFIDF_MATRIX_FILE_NAME)
+        self.tfidf_vocab_file = os.path.join(data_dir, TFIDF_VOCAB_FILE_NAME)
+        self.tuning = tuning or load_tuning(data_dir)
         
         # These will be loaded lazily
         self.model = None
         self.nlp = None
         self.index = None
+        self.tfidf = None
         
         # Core data
         self.ghdb_dorks = []
         self.keyword_index = defaultdict(set)
         self.operator_index = defaultdict(list)
+        self.cooccurrence = {}
+        self.stats = None
         
-        # Load dorks
-        print("📂 Loading dork database...")
-        self.load_all_dorks()
+        # Query understanding
+        self.taxonomy = taxonomy or QueryTaxonomy.load()
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         
-        # Build indices
-        print("🔨 Building search indices...")
-        self.build_fast_indices()
+        # Hot reload state
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._file_signatures = {}
+        self._file_dorks = {}
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self._generation = 0
         
-        # Load AI models if requested
-        if use_ai:
-            self._init_ai_models()
+        # Deadline-aware search state
+        self._stage_pool = None
+        self._stage_pool_lock = threading.Lock()
+        self._latency_lock = threading.Lock()
+        self.stage_latencies = {}
+        self.answered_paths = Counter()
+        
+        # Startup stages, filled in by the constructor
+        self._started = time.perf_counter()
+        self.startup_timings = {}
+        self._stages = {}
+    
+    def _start_stage(self, name, target, after=()):
+        """Run a startup stage on a background thread once its dependencies finish"""
+        self._stages[name] = threading.Event()
+        dependencies = [self._stages[dep] for dep in after]
+        
+        def run():
+            for event in dependencies:
+                event.wait()
+            try:
+                target()
+            except Exception as e:
+                print(f"⚠️ Startup stage '{name}' failed: {e}")
+            finally:
+                self._finish_stage(name)
+        
+        threading.Thread(target=run, name=f'dork-startup-{name}', daemon=True).start()
+    
+    def _finish_stage(self, name):
+        """Record when a startup stage completed and release its dependents"""
+        self.startup_timings[name] = time.perf_counter() - self._started
+        self._stages[name].set()
+    
+    def _pending_stages(self):
+        """Startup stages that will enable a richer ranking once they finish"""
+        return [self._stages[name] for name in ('semantic', 'tfidf')
+                if name in self._stages and not self._stages[name].is_set()]
+    
+    def wait_until_ready(self, timeout=None):
+        """Block until every startup stage has finished; False on timeout"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for event in list(self._stages.values()):
+            remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            if not event.wait(remaining):
+                return False
+        return True
     
-    def _init_ai_models(self):
-        """Load AI models with error handling"""
+    def _load_encoder(self):
+        """Apply thread tuning and load the sentence transformer"""
+        set_thread_count(self.tuning['threads'])
+        
+        if not self.tuning['semantic']:
+            print("⚡ Semantic search disabled by tuning config, using keyword mode")
+            return
+        
         try:
             print("🤖 Loading AI models...")
             from sentence_transformers import SentenceTransformer
-            import faiss
             
             self.model = SentenceTransformer('all-MiniLM-L6-v2')
             print("✓ Sentence transformer loaded")
-            
-            if self.ghdb_dorks:
-                print("⚙️ Creating embeddings...")
-                embeddings = self.model.encode(self.ghdb_dorks, show_progress_bar=True, batch_size=32)
-                self.index = faiss.IndexFlatIP(embeddings.shape[1])
-                self.index.add(embeddings.astype('float32'))
-                print("✓ Semantic search ready")
         except Exception as e:
             print(f"⚠️ AI mode not available: {e}")
             print("⚡ Using fast keyword-only mode")
             self.model = None
-        
+    
+    def _import_vector_lib(self):
+        """Import FAISS ahead of time so building the index does not wait on it"""
+        if not self.tuning['semantic']:
+            return
+        try:
+            import faiss
+        except Exception:
+            pass
+    
+    def _load_nlp(self):
+        """Load spaCy, dropping queries memoized without lemmas in the meantime"""
         try:
             import spacy
-            self.nlp = spacy.load("en_core_web_sm")
+            nlp = spacy.load("en_core_web_sm")
             print("✓ NLP loaded")
         except:
             print("⚠️ spaCy not available, using regex")
-            self.nlp = None
+            return
+        
+        with self._query_cache_lock:
+            self.nlp = nlp
+            self._query_cache.clear()
+    
+    def _build_semantic_index(self):
+        """Embed the corpus and switch semantic search on"""
+        if self.model is None:
+            return
+        
+        # Hold off reloads so the index matches the corpus it is swapped in with
+        with self._reload_lock:
+            if not self.ghdb_dorks:
+                return
+            try:
+                print("⚙️ Creating embeddings...")
+                embeddings = self.model.encode(self.ghdb_dorks, show_progress_bar=True,
+                                               batch_size=self.tuning['batch_size'])
+                index = build_vector_index(embeddings, self.tuning['index_type'])
+            except Exception as e:
+                print(f"⚠️ AI mode not available: {e}")
+                print("⚡ Using fast keyword-only mode")
+                self.model = None
+                return
+            
+            with self._swap_lock:
+                self.index = index
+            print("✓ Semantic search ready")
+    
+    def _init_tfidf(self):
+        """Load or build the TF-IDF matrix and switch TF-IDF ranking on"""
+        with self._reload_lock:
+            ranker = self._load_tfidf()
+            with self._swap_lock:
+                self.tfidf = ranker
+    
+    def _load_tfidf(self):
+        """Load the persisted TF-IDF matrix for this corpus, or build it"""
+        if not self.ghdb_dorks:
+            return None
+        
+        signature = self._corpus_signature()
+        if os.path.exists(self.tfidf_vocab_file) and os.path.exists(self.tfidf_matrix_file):
+            try:
+                ranker = TfidfRanker.load(self.tfidf_matrix_file, self.tfidf_vocab_file, signature)
+                if ranker is not None and ranker.matrix.shape[0] == len(self.ghdb_dorks):
+                    print(f"✓ Loaded TF-IDF matrix {ranker.matrix.shape[0]:,} x {ranker.matrix.shape[1]:,}")
+                    return ranker
+            except Exception:
+                pass
+        
+        try:
+            print("🧮 Building TF-IDF matrix...")
+            ranker = TfidfRanker.fit(self.ghdb_dorks)
+            print(f"✓ TF-IDF matrix {ranker.matrix.shape[0]:,} x {ranker.matrix.shape[1]:,}")
+        except Exception as e:
+            print(f"⚠️ TF-IDF ranking not available: {e}")
+            return None
+        
+        try:
+            ranker.save(self.tfidf_matrix_file, self.tfidf_vocab_file, signature)
+            print(f"💾 TF-IDF matrix saved")
+        except Exception:
+            pass
+        return ranker
     
     def load_all_dorks(self):
         """Load dorks with caching"""
+        self._file_signatures = self._scan_signatures()
+        
         # Try cache first
-        if os.path.exists(self.cache_file):
+        if self.ingest_buffer:
+            if self._load_lines_cache():
+                return
+        elif os.path.exists(self.cache_file):
             try:
                 with open(self.cache_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
@@ -86,8 +701,7 @@ class DorkGenerator:
         
         # Load from files
         print("🔍 Scanning dork files...")
-        files = glob.glob(os.path.join(self.data_dir, '*.txt'))
-        files.extend(glob.glob(os.path.join(self.data_dir, '*.md')))
+        files = self._find_corpus_files()
         
         if not files:
             print("⚠️ No files found, using samples")
@@ -95,14 +709,18 @@ class DorkGenerator:
             return
         
         print(f"📄 Found {len(files)} files")
+        
+        if self.ingest_buffer:
+            self._load_external(files)
+            return
+        
         all_dorks = set()
+        started = time.perf_counter()
         
         for i, path in enumerate(files):
             try:
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    dorks = self.extract_dorks(content)
-                    all_dorks.update(dorks)
+                with open_corpus_file(path) as f:
+                    all_dorks.update(self.extract_dorks(f))
                     
                     if (i + 1) % 10 == 0:
                         print(f"  Processed {i+1}/{len(files)}, found {len(all_dorks):,} dorks")
@@ -110,34 +728,178 @@ class DorkGenerator:
                 print(f"⚠️ Error in {os.path.basename(path)}: {e}")
         
         self.ghdb_dorks = list(all_dorks)
-        print(f"✓ Loaded {len(self.ghdb_dorks):,} unique dorks")
+        read_mb = sum(size for _, size in self._file_signatures.values()) / (1024 * 1024)
+        print(f"✓ Loaded {len(self.ghdb_dorks):,} unique dorks "
+              f"({read_mb:,.1f} MB read in {time.perf_counter() - started:.2f}s)")
         
-        # Save cache
+        self._save_cache()
+    
+    def _save_cache(self):
+        """Persist ghdb_dorks in the cache format of the current mode"""
         try:
             os.makedirs(self.data_dir, exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump({'dorks': self.ghdb_dorks}, f)
+            if self.ingest_buffer:
+                tmp_cache = self.lines_cache_file + '.tmp'
+                with open(tmp_cache, 'w', encoding='utf-8') as f:
+                    for dork in self.ghdb_dorks:
+                        f.write(dork + '\n')
+                os.replace(tmp_cache, self.lines_cache_file)
+            else:
+                with open(self.cache_file, 'w', encoding='utf-8') as f:
+                    json.dump({'dorks': self.ghdb_dorks}, f)
             print(f"💾 Cache saved")
         except:
             pass
     
+    def _find_corpus_files(self):
+        """List corpus files in the data directory"""
+        return find_corpus_files(self.data_dir)
+    
+    def _scan_signatures(self):
+        """Map each corpus file to its (mtime, size) signature"""
+        signatures = {}
+        for path in self._find_corpus_files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (st.st_mtime_ns, st.st_size)
+        return signatures
+    
+    def _read_file_dorks(self, path):
+        """Extract the dork set of a single corpus file"""
+        try:
+            with open_corpus_file(path) as f:
+                return self.extract_dorks(f)
+        except Exception as e:
+            print(f"⚠️ Error in {os.path.basename(path)}: {e}")
+            return set()
+    
+    def _load_lines_cache(self):
+        """Stream the line-oriented cache written by external-sort ingestion"""
+        if not os.path.exists(self.lines_cache_file):
+            return False
+        try:
+            with open(self.lines_cache_file, 'r', encoding='utf-8') as f:
+                self.ghdb_dorks = [line.rstrip('\n') for line in f if line.strip()]
+        except Exception:
+            return False
+        if not self.ghdb_dorks:
+            return False
+        print(f"✓ Loaded {len(self.ghdb_dorks):,} dorks from cache")
+        return True
+    
+    def _load_external(self, files):
+        """External-sort ingestion: dedup in sorted runs, then k-way merge
+        
+        The in-memory dedup set is flushed to a sorted temporary run whenever
+        its estimated size reaches ``ingest_buffer``, and runs are merged into
+        the line-oriented cache, dropping duplicates across runs. This bounds
+        the dedup step only: the merged corpus is still loaded into memory and
+        indexed for serving, so process memory grows with the corpus.
+        """
+        budget = max(self.ingest_buffer, 1)
+        print(f"🧮 External-sort ingestion: {budget // (1024 * 1024):,} MB dedup buffer")
+        
+        os.makedirs(self.data_dir, exist_ok=True)
+        run_dir = tempfile.mkdtemp(prefix='dork_runs_', dir=self.data_dir)
+        runs = []
+        buffer = set()
+        used = 0
+        
+        try:
+            for i, path in enumerate(files):
+                try:
+                    with open_corpus_file(path) as f:
+                        for dork in self._iter_dorks(f):
+                            if dork in buffer:
+                                continue
+                            buffer.add(dork)
+                            used += sys.getsizeof(dork) + SET_ENTRY_OVERHEAD
+                            if used >= budget:
+                                runs.append(self._spill_run(buffer, run_dir))
+                                buffer = set()
+                                used = 0
+                except Exception as e:
+                    print(f"⚠️ Error in {os.path.basename(path)}: {e}")
+                
+                if (i + 1) % 10 == 0:
+                    print(f"  Processed {i+1}/{len(files)}, {len(runs)} runs spilled")
+            
+            if buffer:
+                runs.append(self._spill_run(buffer, run_dir))
+                buffer = set()
+            
+            # Reduce to at most MERGE_FAN_IN runs so open file handles stay bounded
+            while len(runs) > MERGE_FAN_IN:
+                merged = []
+                for start in range(0, len(runs), MERGE_FAN_IN):
+                    group = runs[start:start + MERGE_FAN_IN]
+                    fd, out_path = tempfile.mkstemp(suffix='.run', dir=run_dir)
+                    os.close(fd)
+                    self._merge_runs(group, out_path)
+                    for path in group:
+                        os.remove(path)
+                    merged.append(out_path)
+                runs = merged
+            
+            tmp_cache = self.lines_cache_file + '.tmp'
+            total = self._merge_runs(runs, tmp_cache)
+            os.replace(tmp_cache, self.lines_cache_file)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        
+        print(f"✓ Merged {total:,} unique dorks")
+        print(f"💾 Cache saved")
+        self._load_lines_cache()
+    
+    def _spill_run(self, buffer, run_dir):
+        """Write a sorted run of dorks to a temporary file"""
+        fd, path = tempfile.mkstemp(suffix='.run', dir=run_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for dork in sorted(buffer):
+                f.write(dork + '\n')
+        return path
+    
+    def _merge_runs(self, runs, out_path):
+        """K-way merge of sorted runs into out_path, dropping duplicates"""
+        handles = [open(path, 'r', encoding='utf-8') for path in runs]
+        count = 0
+        try:
+            with open(out_path, 'w', encoding='utf-8') as out:
+                last = None
+                # Runs are sorted on the bare dork; compare the same key here, since
+                # dorks holding characters below '\n' (tabs) sort differently with it
+                for line in heapq.merge(*handles, key=lambda line: line.rstrip('\n')):
+                    if line != last:
+                        out.write(line)
+                        last = line
+                        count += 1
+        finally:
+            for handle in handles:
+                handle.close()
+        return count
+    
     def extract_dorks(self, content):
-        """Extract dorks from content"""
-        dorks = set()
+        """Extract dorks from content (a string or an iterable of lines)"""
+        if isinstance(content, str):
+            content = content.split('\n')
+        return set(self._iter_dorks(content))
+    
+    def _iter_dorks(self, lines):
+        """Yield dork candidates from an iterable of lines"""
         operators = ['inurl:', 'intitle:', 'filetype:', 'site:', 'intext:', 'ext:', '"index of"']
         
-        for line in content.split('\n'):
+        for line in lines:
             line = line.strip()
             if not line or len(line) > 500 or line.startswith('#'):
                 continue
             
             if any(op in line.lower() for op in operators):
-                dorks.add(line)
+                yield line
             elif any(kw in line.lower() for kw in ['sql', 'config', 'admin', 'password', 'backup']):
                 if not line.startswith('http'):
-                    dorks.add(line)
-        
-        return dorks
+                    yield line
     
     def _create_samples(self):
         """Create sample dorks"""
@@ -158,112 +920,608 @@ class DorkGenerator:
             return
         
         for idx, dork in enumerate(self.ghdb_dorks):
-            words = re.findall(r'\b\w+\b', dork.lower())
-            for word in words:
-                if len(word) > 2:
-                    self.keyword_index[word].add(idx)
-        
-        operators = ['inurl:', 'intitle:', 'filetype:', 'site:']
-        for idx, dork in enumerate(self.ghdb_dorks):
-            for op in operators:
-                if op in dork.lower():
-                    self.operator_index[op].append(idx)
+            self._index_dork(idx, dork, self.keyword_index, self.operator_index)
         
         print(f"✓ Indexed {len(self.keyword_index)} keywords")
+        
+        self._load_cooccurrence()
+    
+    def _corpus_signature(self):
+        """Digest of the corpus, used to validate derived caches"""
+        digest = hashlib.sha1()
+        for dork in self.ghdb_dorks:
+            digest.update(dork.encode('utf-8', 'ignore'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+    
+    def _load_cooccurrence(self):
+        """Load the co-occurrence table for this corpus, building it if stale"""
+        signature = self._corpus_signature()
+        if os.path.exists(self.cooccur_file):
+            try:
+                with open(self.cooccur_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('signature') == signature:
+                    self.cooccurrence = data.get('terms', {})
+                    print(f"✓ Loaded co-occurrence table ({len(self.cooccurrence):,} terms)")
+                    return
+            except:
+                pass
+        
+        self.cooccurrence = build_cooccurrence(self.ghdb_dorks)
+        print(f"✓ Built co-occurrence table ({len(self.cooccurrence):,} terms)")
+        try:
+            with open(self.cooccur_file, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'terms': self.cooccurrence}, f)
+        except:
+            pass
+    
+    def _expand_query(self, words):
+        """Related terms for the query words as [(term, weight)], within budget
+        
+        Weights stay below the +10 of a literal word match, so expansion only
+        reorders and extends results, never outranks what the user typed.
+        """
+        expansions = {}
+        for word in sorted(words):
+            related = self.cooccurrence.get(word)
+            if related is None:
+                related = self.cooccurrence.get(_singular(word))
+            for term, npmi in (related or [])[:EXPANSION_PER_TERM]:
+                if term in words or term in expansions:
+                    continue
+                expansions[term] = max(1, round(5 * npmi))
+                if len(expansions) >= EXPANSION_BUDGET:
+                    return list(expansions.items())
+        return list(expansions.items())
+    
+    def _index_dork(self, idx, dork, keyword_index, operator_index):
+        """Add one dork to the keyword and operator postings"""
+        dork_lower = dork.lower()
+        for word in re.findall(r'\b\w+\b', dork_lower):
+            if len(word) > 2:
+                keyword_index[word].add(idx)
+        
+        for op in ['inurl:', 'intitle:', 'filetype:', 'site:']:
+            if op in dork_lower:
+                operator_index[op].append(idx)
+    
+    def _snapshot(self):
+        """Grab a consistent view of the corpus for one query"""
+        with self._swap_lock:
+            return CorpusSnapshot(self.ghdb_dorks, self.keyword_index, self.operator_index,
+                                  self.index, self.tfidf, self._generation)
+    
+    def reload(self):
+        """Pick up added, changed and removed corpus files without a restart
+        
+        New structures are built copy-on-write next to the live ones and
+        swapped in under ``_swap_lock``, so queries already running keep the
+        snapshot they started with. The first reload keeps every file's dork
+        set to diff later reloads against, which roughly doubles the memory
+        held for the corpus. Returns a summary dict.
+        """
+        with self._reload_lock:
+            signatures = self._scan_signatures()
+            changed = [p for p, sig in signatures.items() if self._file_signatures.get(p) != sig]
+            deleted = [p for p in self._file_signatures if p not in signatures]
+            summary = {'changed_files': len(changed), 'deleted_files': len(deleted),
+                       'added': 0, 'removed': 0}
+            
+            if not changed and not deleted and self._file_dorks:
+                return summary
+            
+            # Per-file dork sets are only materialised on the first reload
+            if not self._file_dorks:
+                changed = list(signatures)
+            file_dorks = dict(self._file_dorks)
+            for path in deleted:
+                file_dorks.pop(path, None)
+            for path in changed:
+                file_dorks[path] = self._read_file_dorks(path)
+            
+            corpus = set()
+            for dorks in file_dorks.values():
+                corpus.update(dorks)
+            
+            old = self._snapshot()
+            current = set(old.dorks)
+            added = sorted(corpus - current)
+            removed = current - corpus
+            summary['added'] = len(added)
+            summary['removed'] = len(removed)
+            
+            if added or removed:
+                self._apply_update(old, added, removed)
+                print(f"🔄 Reloaded corpus: +{len(added):,} / -{len(removed):,} dorks")
+                self._save_cache()
+                # Expansion terms come from the corpus too; swap in a fresh table
+                self._load_cooccurrence()
+            
+            self._file_dorks = file_dorks
+            self._file_signatures = signatures
+            return summary
+    
+    def _apply_update(self, old, added, removed):
+        """Build updated indices from a snapshot and swap them in atomically"""
+        if removed:
+            dorks = []
+            remap = {}
+            removed_ids = []
+            for idx, dork in enumerate(old.dorks):
+                if dork in removed:
+                    removed_ids.append(idx)
+                else:
+                    remap[idx] = len(dorks)
+                    dorks.append(dork)
+            keyword_index = defaultdict(set)
+            for word, ids in old.keyword_index.items():
+                kept = {remap[i] for i in ids if i in remap}
+                if kept:
+                    keyword_index[word] = kept
+            operator_index = defaultdict(list)
+            for op, ids in old.operator_index.items():
+                operator_index[op] = [remap[i] for i in ids if i in remap]
+        else:
+            dorks = list(old.dorks)
+            removed_ids = []
+            # Copy-on-write: only postings touched by new dorks get fresh sets
+            keyword_index = defaultdict(set, old.keyword_index)
+            operator_index = defaultdict(list, old.operator_index)
+            touched_words = set()
+            for dork in added:
+                touched_words.update(w for w in re.findall(r'\b\w+\b', dork.lower()) if len(w) > 2)
+            for word in touched_words & keyword_index.keys():
+                keyword_index[word] = set(keyword_index[word])
+            for op in operator_index:
+                operator_index[op] = list(operator_index[op])
+        
+        start = len(dorks)
+        dorks.extend(added)
+        for idx in range(start, len(dorks)):
+            self._index_dork(idx, dorks[idx], keyword_index, operator_index)
+        
+        stats = None
+        if self.stats is not None:
+            stats = {key: value.copy() if isinstance(value, Counter) else value
+                     for key, value in self.stats.items()}
+            self._count_stats(stats, added)
+            self._count_stats(stats, removed, sign=-1)
+            stats['total_dorks'] = len(dorks)
+        
+        index = self._update_vector_index(old.index, added, removed_ids)
+        
+        tfidf = old.tfidf
+        if tfidf is not None:
+            try:
+                tfidf = tfidf.updated(removed_ids, added)
+            except Exception as e:
+                print(f"⚠️ Could not update TF-IDF matrix: {e}")
+                tfidf = None
+        
+        with self._swap_lock:
+            self.ghdb_dorks = dorks
+            self.keyword_index = keyword_index
+            self.operator_index = operator_index
+            self.index = index
+            self.tfidf = tfidf
+            self.stats = stats
+            self._generation += 1
+    
+    def _update_vector_index(self, index, added, removed_ids):
+        """Return a FAISS index reflecting the update, leaving the old one intact"""
+        if index is None or self.model is None:
+            return index
+        try:
+            import faiss
+            import numpy as np
+            
+            if removed_ids and self.tuning['index_type'] != 'flat':
+                # HNSW cannot delete: rebuild from the surviving vectors
+                keep = np.ones(index.ntotal, dtype=bool)
+                keep[removed_ids] = False
+                vectors = index.reconstruct_n(0, index.ntotal)[keep]
+                index = build_vector_index(vectors, self.tuning['index_type'])
+            else:
+                index = faiss.clone_index(index)
+                if removed_ids:
+                    # IndexFlat compacts in order, matching the ghdb_dorks compaction
+                    index.remove_ids(np.array(removed_ids, dtype='int64'))
+            if added:
+                embeddings = self.model.encode(added, batch_size=self.tuning['batch_size'])
+                index.add(embeddings.astype('float32'))
+            return index
+        except Exception as e:
+            print(f"⚠️ Could not update semantic index: {e}")
+            return None
+    
+    def start_watcher(self, interval=5.0):
+        """Poll the data directory and reload on change in a daemon thread"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._watcher_stop.clear()
+        
+        def watch():
+            while not self._watcher_stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠️ Reload failed: {e}")
+        
+        self._watcher = threading.Thread(target=watch, name='dork-watcher', daemon=True)
+        self._watcher.start()
+    
+    def stop_watcher(self):
+        """Stop the directory watcher started by start_watcher"""
+        self._watcher_stop.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+    
+    def close(self):
+        """Stop the watcher and the search stage pool
+        
+        Stages already running cannot be interrupted; the interpreter still
+        joins them at exit, but queued ones are cancelled.
+        """
+        self.stop_watcher()
+        with self._stage_pool_lock:
+            pool, self._stage_pool = self._stage_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
     
     def understand_query(self, query):
         """Parse query"""
-        query_lower = query.lower()
+        return self.understand_queries([query])[0]
+    
+    def understand_queries(self, queries):
+        """Parse a batch of queries, memoized per normalized query
         
-        tech_map = {
-            'wordpress': r'\b(wordpress|wp)\b',
-            'joomla': r'\bjoomla\b',
-            'sql': r'\b(sql|mysql|database|db)\b',
-            'php': r'\bphp\b'
-        }
+        When spaCy is loaded, uncached queries go through ``nlp.pipe`` in one
+        batch and their lemmas are matched alongside the raw tokens.
+        """
+        keys = [' '.join(_tokenize(query)) for query in queries]
         
-        target_map = {
-            'config': r'\b(config|configuration)\b',
-            'login': r'\b(login|admin)\b',
-            'backup': r'\b(backup|dump)\b',
-            'password': r'\b(password|passwd)\b',
-            'database': r'\b(database|db)\b'
-        }
+        with self._query_cache_lock:
+            missing = [key for key in dict.fromkeys(keys) if key not in self._query_cache]
         
-        filetype_map = {
-            'sql': r'\bsql\b',
-            'php': r'\bphp\b',
-            'env': r'\benv\b',
-            'log': r'\blog\b'
-        }
+        if missing:
+            nlp = self.nlp
+            if nlp:
+                docs = nlp.pipe(missing, batch_size=64)
+                parsed = [self.taxonomy.match(key.split(), _tokenize(' '.join(t.lemma_ for t in doc)))
+                          for key, doc in zip(missing, docs)]
+            else:
+                parsed = [self.taxonomy.match(key.split()) for key in missing]
+            
+            with self._query_cache_lock:
+                # Parsed without lemmas before spaCy finished loading: use, don't memoize
+                if self.nlp is nlp:
+                    for key, components in zip(missing, parsed):
+                        self._query_cache[key] = components
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
         
-        components = {
-            'technology': [],
-            'target': [],
-            'filetype': []
-        }
+        results = []
+        with self._query_cache_lock:
+            for key in keys:
+                components = self._query_cache.get(key)
+                if components is None:
+                    components = self.taxonomy.match(key.split())
+                else:
+                    self._query_cache.move_to_end(key)
+                # Hand out copies so callers cannot mutate the memoized entry
+                results.append({category: list(values) for category, values in components.items()})
+        return results
+    
+    def find_relevant_dorks(self, query, top_k=20, deadline_ms=None):
+        """Find dorks using best available method, optionally within a deadline"""
+        return self.search_with_deadline(query, top_k, deadline_ms)[0]
+    
+    def search_with_deadline(self, query, top_k=20, deadline_ms=None, start=0):
+        """Rank dorks [start, start + top_k) within a latency budget
+        
+        Returns (dorks, path). With a deadline, the richest available stage
+        (semantic, else TF-IDF) and keyword ranking both start on worker
+        threads as the request arrives. At the deadline the rich results
+        answer if ready; otherwise the keyword results answer as
+        'keyword-fallback'. If neither is ready, whichever stage finishes
+        first answers and path is 'deadline-miss'. Without a deadline the
+        richest stage is awaited. While a semantic or TF-IDF stage is still building at
+        startup, keyword results answer as 'keyword-fallback' (or
+        'deadline-miss' if over budget); no thread is parked waiting for it.
+        """
+        began = time.perf_counter()
+        snapshot = self._snapshot()
+        mode = self._best_mode(snapshot)
+        stop = start + top_k
         
-        for tech, pattern in tech_map.items():
-            if re.search(pattern, query_lower):
-                components['technology'].append(tech)
+        if deadline_ms is None or mode == 'k':
+            dorks = self._run_stage(mode, query, snapshot, start, stop)
+            path = SEARCH_STAGES[mode]
+            if deadline_ms is not None and time.perf_counter() - began > deadline_ms / 1000.0:
+                path = 'deadline-miss'
+            elif deadline_ms is not None and self._pending_stages():
+                path = 'keyword-fallback'
+        else:
+            deadline = began + deadline_ms / 1000.0
+            
+            def timed_stage(stage_mode):
+                # Finish time, not when the caller gets to look, decides readiness
+                dorks = self._run_stage(stage_mode, query, snapshot, start, stop)
+                return dorks, time.perf_counter()
+            
+            def ready(future):
+                return _succeeded(future) and future.result()[1] <= deadline
+            
+            pool = self._stage_executor()
+            rich = pool.submit(timed_stage, mode)
+            keyword = pool.submit(timed_stage, 'k')
+            
+            concurrent.futures.wait([rich], timeout=max(deadline - time.perf_counter(), 0))
+            if ready(rich):
+                keyword.cancel()
+                dorks = rich.result()[0]
+                path = SEARCH_STAGES[mode]
+            else:
+                concurrent.futures.wait([keyword], timeout=max(deadline - time.perf_counter(), 0))
+                if ready(keyword):
+                    dorks = keyword.result()[0]
+                    path = 'keyword-fallback'
+                else:
+                    # Nothing ready at the deadline: whichever stage lands first answers
+                    concurrent.futures.wait([rich, keyword], return_when=concurrent.futures.FIRST_COMPLETED)
+                    finished = [future for future in (rich, keyword) if _succeeded(future)] or [keyword]
+                    dorks = min((future.result() for future in finished), key=lambda result: result[1])[0]
+                    path = 'deadline-miss'
         
-        for target, pattern in target_map.items():
-            if re.search(pattern, query_lower):
-                components['target'].append(target)
+        self._record_latency('request', time.perf_counter() - began, path)
+        return dorks, path
+    
+    def _best_mode(self, snapshot):
+        """Richest ranking stage available for this snapshot"""
+        if self.model and snapshot.index:
+            return 's'
+        if snapshot.tfidf is not None:
+            return 't'
+        return 'k'
+    
+    def _stage_executor(self):
+        """Thread pool for rich search stages, created on first use"""
+        with self._stage_pool_lock:
+            if self._stage_pool is None:
+                self._stage_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=SEARCH_STAGE_WORKERS, thread_name_prefix='dork-search')
+            return self._stage_pool
+    
+    def _run_stage(self, mode, query, snapshot, start, stop):
+        """Run one ranking stage to completion and record its latency"""
+        began = time.perf_counter()
+        if not snapshot.dorks:
+            dorks = []
+        elif mode == 's':
+            dorks = [d for d, _ in itertools.islice(self._semantic_search(query, snapshot), start, stop)]
+        elif mode == 't':
+            dorks = [d for d, _ in itertools.islice(self._tfidf_search(query, snapshot), start, stop)]
+        else:
+            dorks = [d for d, _ in itertools.islice(self._keyword_search(query, snapshot), start, stop)]
+        self._record_latency(SEARCH_STAGES[mode], time.perf_counter() - began)
+        return dorks
+    
+    def _record_latency(self, name, seconds, path=None):
+        """Keep a bounded window of latencies per stage and count answers per path"""
+        with self._latency_lock:
+            samples = self.stage_latencies.get(name)
+            if samples is None:
+                samples = self.stage_latencies[name] = deque(maxlen=LATENCY_SAMPLES)
+            samples.append(seconds * 1000.0)
+            if path is not None:
+                self.answered_paths[path] += 1
+    
+    def _stage_estimate(self, name, pct):
+        """Observed latency percentile of a stage in seconds, or None if unseen"""
+        with self._latency_lock:
+            values = sorted(self.stage_latencies.get(name, ()))
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * pct / 100))] / 1000.0
+    
+    def search_latency_report(self):
+        """Per-stage latency percentiles (ms) and how often each path answered"""
+        with self._latency_lock:
+            samples = {name: sorted(values) for name, values in self.stage_latencies.items()}
+            answered = dict(self.answered_paths)
         
-        for ft, pattern in filetype_map.items():
-            if re.search(pattern, query_lower):
-                components['filetype'].append(ft)
+        def percentile(values, pct):
+            return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
         
-        return components
+        stages = {}
+        for name, values in samples.items():
+            stages[name] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99)
+            }
+        return {'stages': stages, 'answered': answered}
     
-    def find_relevant_dorks(self, query, top_k=20):
-        """Find dorks using best available method"""
-        if not self.ghdb_dorks:
-            return []
+    def iter_relevant_dorks(self, query, cursor=None):
+        """Yield ranked dorks lazily, optionally resuming from a page cursor"""
+        for dork, _ in self._iter_ranked(query, cursor):
+            yield dork
+    
+    def fetch_page(self, query, page_size=20, cursor=None):
+        """Return (dorks, next_cursor) for one page of ranked results
+        
+        ``next_cursor`` is an opaque string that resumes right after the
+        last returned dork without re-ranking earlier pages; it is None once
+        the results are exhausted.
+        """
+        page = []
+        position = None
+        for dork, position in itertools.islice(self._iter_ranked(query, cursor), page_size):
+            page.append(dork)
         
-        if self.model and self.index:
-            return self._semantic_search(query, top_k)
+        if len(page) < page_size or position is None:
+            return page, None
+        return page, self._encode_cursor(query, position)
+    
+    def _encode_cursor(self, query, position):
+        """Pack the resume position of a ranked iteration into a cursor"""
+        state = {'q': query, 'pos': position}
+        return base64.urlsafe_b64encode(json.dumps(state).encode('utf-8')).decode('ascii')
+    
+    def _decode_cursor(self, query, cursor):
+        """Unpack a cursor, checking it belongs to this query"""
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            position = state['pos']
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if state.get('q') != query:
+            raise ValueError("Cursor was issued for a different query")
+        return position
+    
+    def _iter_ranked(self, query, cursor=None):
+        """Yield (dork, position) pairs in rank order from one snapshot"""
+        snapshot = self._snapshot()
+        if not snapshot.dorks:
+            return
         
-        return self._keyword_search(query, top_k)
+        position = None
+        if cursor is not None:
+            position = self._decode_cursor(query, cursor)
+            if position[1] != snapshot.generation:
+                raise ValueError("Cursor is stale: the corpus was reloaded")
+        
+        mode = position[0] if position is not None else self._best_mode(snapshot)
+        
+        if mode == 's':
+            yield from self._semantic_search(query, snapshot, position)
+        elif mode == 't':
+            yield from self._tfidf_search(query, snapshot, position)
+        else:
+            yield from self._keyword_search(query, snapshot, position)
     
-    def _semantic_search(self, query, top_k):
-        """Semantic search"""
+    def find_relevant_dorks_batch(self, queries, top_k=20):
+        """Find dorks for many queries; one sparse product when TF-IDF is on"""
+        snapshot = self._snapshot()
+        if snapshot.tfidf is not None and not (self.model and snapshot.index):
+            dorks = snapshot.dorks
+            return [[dorks[idx] for idx in indices]
+                    for indices in snapshot.tfidf.top_k_batch(list(queries), top_k)]
+        return [self.find_relevant_dorks(query, top_k) for query in queries]
+    
+    def _tfidf_search(self, query, snapshot, position=None):
+        """TF-IDF cosine ranking, popped lazily off a heap, then padding"""
+        dorks = snapshot.dorks
+        indices, values = snapshot.tfidf.scores(query)
+        matched = set(indices.tolist())
+        
+        pad_start = 0
+        if position is None:
+            heap = [(-float(score), int(idx)) for idx, score in zip(indices, values)]
+        elif position[2] == 'r':
+            last = (position[3], position[4])
+            heap = [(-float(score), int(idx)) for idx, score in zip(indices, values)
+                    if (-float(score), int(idx)) > last]
+        else:
+            heap = []
+            pad_start = position[3]
+        heapq.heapify(heap)
+        
+        generation = snapshot.generation
+        while heap:
+            neg_score, idx = heapq.heappop(heap)
+            yield dorks[idx], ['t', generation, 'r', neg_score, idx]
+        
+        for idx in range(pad_start, len(dorks)):
+            if idx not in matched:
+                yield dorks[idx], ['t', generation, 'p', idx + 1]
+    
+    def _semantic_search(self, query, snapshot, position=None):
+        """Semantic search, fetching growing FAISS windows on demand"""
+        dorks = snapshot.dorks
+        offset = position[2] if position else 0
         emb = self.model.encode([query]).astype('float32')
-        scores, indices = self.index.search(emb, min(top_k * 2, len(self.ghdb_dorks)))
-        return [self.ghdb_dorks[idx] for idx in indices[0][:top_k] if idx < len(self.ghdb_dorks)]
+        window = SEMANTIC_WINDOW
+        
+        while offset < len(dorks):
+            window = max(window, offset + SEMANTIC_WINDOW)
+            k = min(window, len(dorks))
+            scores, indices = snapshot.index.search(emb, k)
+            for idx in indices[0][offset:]:
+                offset += 1
+                if 0 <= idx < len(dorks):
+                    yield dorks[idx], ['s', snapshot.generation, offset]
+            if k == len(dorks):
+                break
+            window *= 2
     
-    def _keyword_search(self, query, top_k):
-        """Keyword-based search"""
-        words = set(re.findall(r'\b\w+\b', query.lower()))
-        words = {w for w in words if len(w) > 2}
+    def _keyword_search(self, query, snapshot, position=None):
+        """Keyword-based search
         
-        scores = {}
-        for idx, dork in enumerate(self.ghdb_dorks):
-            score = 0
+        Scored dorks come off a heap one at a time, so asking for the first
+        page costs O(n + k log n) instead of a full sort; the remaining slots
+        are padded in corpus order, skipping dorks already ranked.
+        """
+        dorks = snapshot.dorks
+        scores = self._keyword_scores(query, snapshot)
+        
+        pad_start = 0
+        if position is None:
+            heap = [(-score, idx) for idx, score in scores.items()]
+        elif position[0] == 'r':
+            # Resume strictly after the last ranked (score, index) pair
+            last = (position[2], position[3])
+            heap = [(-score, idx) for idx, score in scores.items() if (-score, idx) > last]
+        else:
+            heap = []
+            pad_start = position[2]
+        heapq.heapify(heap)
+        
+        generation = snapshot.generation
+        while heap:
+            neg_score, idx = heapq.heappop(heap)
+            yield dorks[idx], ['r', generation, neg_score, idx]
+        
+        for idx in range(pad_start, len(dorks)):
+            if idx not in scores:
+                yield dorks[idx], ['p', generation, idx + 1]
+    
+    def _keyword_scores(self, query, snapshot):
+        """Score every dork containing the query or its words: {index: score}"""
+        query_lower = query.lower()
+        words = set(re.findall(r'\b\w+\b', query_lower))
+        words = sorted(w for w in words if len(w) > 2)
+        
+        hits = {word: [] for word in words}
+        phrase_hits = []
+        for idx, dork in enumerate(snapshot.dorks):
             dork_lower = dork.lower()
-            
             for word in words:
                 if word in dork_lower:
-                    score += 10
-            
-            if query.lower() in dork_lower:
-                score += 50
-            
-            if score > 0:
-                scores[idx] = score
+                    hits[word].append(idx)
+            if query_lower in dork_lower:
+                phrase_hits.append(idx)
         
-        sorted_idx = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
-        results = [self.ghdb_dorks[idx] for idx in sorted_idx[:top_k]]
+        scores = {}
+        for word, indices in hits.items():
+            singular = singular_token(word)
+            if singular:
+                indices = set(indices).union(snapshot.keyword_index.get(singular, ()))
+            weight = word_weight(len(indices), len(snapshot.dorks))
+            for idx in indices:
+                scores[idx] = scores.get(idx, 0) + weight
+        for idx in phrase_hits:
+            scores[idx] = scores.get(idx, 0) + 50
         
-        if len(results) < top_k:
-            for dork in self.ghdb_dorks:
-                if dork not in results:
-                    results.append(dork)
-                    if len(results) >= top_k:
-                        break
+        # Co-occurrence expansion: one postings lookup per related term
+        for term, weight in self._expand_query(set(words)):
+            for idx in snapshot.keyword_index.get(term, ()):
+                scores[idx] = scores.get(idx, 0) + weight
         
-        return results
+        return scores
     
     def generate_new_dorks(self, components, max_count=10):
         """Generate new dorks"""
@@ -353,44 +1611,63 @@ class DorkGenerator:
         return generated[:max_count]
     
     def get_dork_statistics(self):
-        """Get statistics"""
-        if not self.ghdb_dorks:
+        """Get statistics (computed once, kept current by reload)"""
+        stats = self.stats
+        if stats is not None:
+            return stats
+        
+        dorks = self._snapshot().dorks
+        if not dorks:
             return {'total_dorks': 0}
         
         stats = {
-            'total_dorks': len(self.ghdb_dorks),
+            'total_dorks': len(dorks),
             'operators': Counter(),
             'filetypes': Counter(),
             'targets': Counter()
         }
+        self._count_stats(stats, dorks)
         
-        for dork in self.ghdb_dorks:
+        with self._swap_lock:
+            if self.ghdb_dorks is dorks:
+                self.stats = stats
+        return stats
+    
+    def _count_stats(self, stats, dorks, sign=1):
+        """Add (or with sign=-1, subtract) dorks to the statistics counters"""
+        for dork in dorks:
             dl = dork.lower()
             
             for op in ['inurl', 'intitle', 'filetype', 'site', 'intext']:
                 if f'{op}:' in dl:
-                    stats['operators'][op] += 1
+                    stats['operators'][op] += sign
             
             ft_match = re.search(r'filetype:(\w+)', dl)
             if ft_match:
-                stats['filetypes'][ft_match.group(1)] += 1
+                stats['filetypes'][ft_match.group(1)] += sign
             
             for target in ['admin', 'login', 'config', 'backup', 'password', 'database']:
                 if target in dl:
-                    stats['targets'][target] += 1
+                    stats['targets'][target] += sign
         
-        return stats
+        if sign < 0:
+            # Drop counters that fell to zero
+            for key in ('operators', 'filetypes', 'targets'):
+                stats[key] = +stats[key]
     
-    def generate_dorks(self, query, count=20):
+    def generate_dorks(self, query, count=20, page=1, page_size=None, deadline_ms=None):
         """Main generation method"""
         print(f"\n🔎 Analyzing: '{query}'")
         
         components = self.understand_query(query)
         print(f"📊 Tech={components['technology']}, Target={components['target']}")
         
-        # Use the count parameter for how many dorks to find
-        relevant = self.find_relevant_dorks(query, top_k=count)
-        print(f"✓ Found {len(relevant)} relevant dorks")
+        # Use the count parameter (or the page size) for how many dorks to find
+        size = page_size or count
+        start = (page - 1) * size
+        relevant, path = self.search_with_deadline(query, size, deadline_ms, start=start)
+        page_note = f", page {page}" if page > 1 or page_size else ""
+        print(f"✓ Found {len(relevant)} relevant dorks ({path}{page_note})")
         
         # Generate proportional number of new dorks (up to count/2)
         generated = self.generate_new_dorks(components, max_count=max(10, count // 2))
@@ -398,6 +1675,9 @@ class DorkGenerator:
         
         return {
             'query': query,
+            'page': page,
+            'rank_offset': start,
+            'search_path': path,
             'components': components,
             'relevant_dorks': relevant,
             'generated_dorks': generated,
@@ -9,6 +9,15 @@ def sanitize_filename(query):
     """Convert query to safe filename"""
     return re.sub(r'[^\w\s-]', '', query).strip().replace(' ', '_')[:50]
 
+def parse_size(value):
+    """Parse a memory size such as 512M, 2G or a plain byte count"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kKmMgG]?)[bB]?\s*', value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r} (use e.g. 512M or 2G)")
+    number, unit = match.groups()
+    scale = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[unit.lower()]
+    return int(float(number) * scale)
+
 def format_number(num):
     """Format number with commas"""
     return f"{num:,}"
@@ -79,14 +88,17 @@ def save_to_markdown(results, filename):
     
     # Relevant Dorks from Database
     relevant_count = len(results['relevant_dorks'])
+    page = results.get('page', 1)
+    first_rank = results.get('rank_offset', 0) + 1
+    page_note = f" (page {page})" if page > 1 else ""
     content.extend([
         f"## 🎲 Relevant Dorks from Database",
         f"",
-        f"*{relevant_count} dorks found matching your query*",
+        f"*{relevant_count} dorks found matching your query{page_note}*",
         f""
     ])
     
-    for i, dork in enumerate(results['relevant_dorks'], 1):
+    for i, dork in enumerate(results['relevant_dorks'], first_rank):
         content.append(f"{i}. `{dork}`")
     
     content.append(f"")
@@ -213,6 +225,10 @@ Examples:
   python main.py "sql database backups" -o sql_dorks.md
   python main.py "admin login pages" --fast
   python main.py "exposed api keys" --count 30
+  python main.py "admin login pages" --fast --ingest-buffer 256M
+  python main.py "sql database backups" --fast --page 3 --page-size 50
+  python main.py "admin login pages" --deadline-ms 150
+  python main.py "admin login pages" --fast --data-dir data_packed
         """
     )
     
@@ -220,10 +236,26 @@ Examples:
     parser.add_argument('--output', '-o', help='Output file name (default: auto-generated)')
     parser.add_argument('--count', '-c', type=int, default=20, help='Number of dorks to find (default: 20)')
     parser.add_argument('--fast', '-f', action='store_true', help='Use fast mode (no AI, keyword-only)')
+    parser.add_argument('--tfidf', action='store_true',
+                        help='Rank with a sparse TF-IDF matrix (needs scikit-learn) when semantic search is off')
     parser.add_argument('--quiet', '-q', action='store_true', help='Minimal output')
+    parser.add_argument('--data-dir', default='data',
+                        help='Corpus directory, raw or packed with pack_corpus.py (default: data)')
+    parser.add_argument('--ingest-buffer', type=parse_size, metavar='SIZE',
+                        help='Dedup buffer for ingestion (e.g. 512M); spills sorted runs to disk. '
+                             'Does not bound total process memory')
+    parser.add_argument('--page', type=int, default=1, help='Page of ranked results to return (default: 1)')
+    parser.add_argument('--page-size', type=int, help='Relevant dorks per page (default: --count)')
+    parser.add_argument('--deadline-ms', type=int, metavar='MS',
+                        help='Search latency budget; falls back to keyword results if semantic/TF-IDF is slower')
     
     args = parser.parse_args()
     
+    if args.page < 1:
+        parser.error("--page must be 1 or greater")
+    if args.deadline_ms is not None and args.deadline_ms < 0:
+        parser.error("--deadline-ms must be 0 or greater")
+    
     if not args.quiet:
         print_banner()
     
@@ -235,13 +267,19 @@ Examples:
                 print("⚡ Fast mode enabled (keyword-only, no AI)")
         
         use_ai = not args.fast
-        generator = DorkGenerator(use_ai=use_ai)
+        generator = DorkGenerator(data_dir=args.data_dir, use_ai=use_ai,
+                                  ingest_buffer=args.ingest_buffer, use_tfidf=args.tfidf)
         
         if not args.quiet:
             print("")
         
         # Generate dorks with the specified count
-        results = generator.generate_dorks(args.query, count=args.count)
+        try:
+            results = generator.generate_dorks(args.query, count=args.count,
+                                               page=args.page, page_size=args.page_size,
+                                               deadline_ms=args.deadline_ms)
+        finally:
+            generator.close()
         
         # Determine output filename
         if args.output:
@@ -267,6 +305,7 @@ Examples:
         print(f"")
         print(f"📊 Database:     {format_number(results['statistics']['total_dorks'])} total dorks")
         print(f"🎲 Found:        {len(results['relevant_dorks'])} relevant dorks")
+        print(f"🛣️ Search path:  {results['search_path']}")
         print(f"✨ Generated:    {len(results['generated_dorks'])} new dorks")
         print(f"📋 Total Output: {total_dorks} dorks")
         print(f"💾 Saved to:     {output_file}")
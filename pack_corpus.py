@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Corpus packing for the Dork Generator
+- Converts the *.txt / *.md files of data/ into compressed, line-oriented shards
+- DorkGenerator streams the shards back through extract_dorks, no temp files
+- Reports I/O bytes and ingest wall time of the packed layout against the raw one
+"""
+
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+
+from dork_generator import DorkGenerator, find_corpus_files, open_corpus_file
+from main import parse_size
+
+CODECS = ('gz', 'bz2', 'xz', 'zst')
+SHARD_PREFIX = 'shard'
+# Uncompressed bytes written to a shard before the next one is started
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024
+
+def open_shard_writer(path, codec, level=None):
+    """Open a compressed text stream for writing one shard"""
+    if codec == 'gz':
+        import gzip
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=level or 6)
+    if codec == 'bz2':
+        import bz2
+        return bz2.open(path, 'wt', encoding='utf-8', compresslevel=level or 9)
+    if codec == 'xz':
+        import lzma
+        return lzma.open(path, 'wt', encoding='utf-8', preset=6 if level is None else level)
+    if codec == 'zst':
+        try:
+            from compression import zstd
+            return zstd.open(path, 'wt', level=level or 10, encoding='utf-8')
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("writing .zst shards needs the zstandard package (pip install zstandard)")
+        raw = zstandard.ZstdCompressor(level=level or 10).stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    raise ValueError(f"unknown codec: {codec!r} (use one of {', '.join(CODECS)})")
+
+def iter_corpus_lines(files):
+    """Yield every line of the corpus files, newline-terminated"""
+    for path in files:
+        with open_corpus_file(path) as f:
+            for line in f:
+                yield line if line.endswith('\n') else line + '\n'
+
+def pack_corpus(data_dir="data", out_dir="data_packed", codec='gz',
+                shard_size=DEFAULT_SHARD_SIZE, level=None):
+    """Write the corpus of data_dir as compressed shards in out_dir; return their paths
+
+    Lines are copied as-is (extract_dorks still filters them on load), so a
+    packed directory ingests to exactly the same dorks as the raw one.
+    """
+    if os.path.abspath(data_dir) == os.path.abspath(out_dir):
+        raise ValueError("output directory must differ from the data directory")
+
+    files = sorted(find_corpus_files(data_dir))
+    if not files:
+        raise ValueError(f"no corpus files found in {data_dir}")
+
+    # Shards from an earlier pack (possibly another codec) would be read twice
+    os.makedirs(out_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(out_dir, f"{SHARD_PREFIX}-*.txt.*")):
+        os.remove(path)
+
+    shards = []
+    writer = None
+    written = 0
+    try:
+        for line in iter_corpus_lines(files):
+            if writer is None:
+                path = os.path.join(out_dir, f"{SHARD_PREFIX}-{len(shards):05d}.txt.{codec}")
+                writer = open_shard_writer(path + '.tmp', codec, level)
+                written = 0
+            writer.write(line)
+            written += len(line)
+            if written >= shard_size:
+                writer.close()
+                writer = None
+                os.replace(path + '.tmp', path)
+                shards.append(path)
+
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(path + '.tmp', path)
+            shards.append(path)
+    finally:
+        if writer is not None:
+            writer.close()
+            os.remove(path + '.tmp')
+
+    return shards
+
+def measure_ingest(data_dir):
+    """Stream a layout through extract_dorks: (files, bytes read, seconds, dorks)"""
+    # Only the stateless extraction methods are used, so skip the full init
+    extractor = DorkGenerator.__new__(DorkGenerator)
+    files = find_corpus_files(data_dir)
+    read_bytes = sum(os.path.getsize(path) for path in files)
+
+    start = time.perf_counter()
+    dorks = set()
+    for path in files:
+        with open_corpus_file(path) as f:
+            dorks.update(extractor.extract_dorks(f))
+    return len(files), read_bytes, time.perf_counter() - start, dorks
+
+def print_layout_report(data_dir, out_dir, codec):
+    """Compare I/O bytes and ingest wall time of the packed and raw layouts"""
+    raw = measure_ingest(data_dir)
+    packed = measure_ingest(out_dir)
+
+    print(f"\n📏 {'Layout':<14} {'Files':>6} {'Bytes read':>12} {'Ingest time':>12} {'Dorks':>9}")
+    for name, (files, read_bytes, seconds, dorks) in (("raw", raw), (f"packed ({codec})", packed)):
+        print(f"   {name:<14} {files:>6,} {read_bytes / (1024 * 1024):>9,.1f} MB "
+              f"{seconds:>11.2f}s {len(dorks):>9,}")
+
+    print(f"\n📉 I/O: {raw[1] / max(packed[1], 1):.1f}x fewer bytes, "
+          f"wall time {packed[2] / max(raw[2], 1e-9):.2f}x of raw")
+    if raw[3] == packed[3]:
+        print("✓ Packed layout yields identical dorks")
+    else:
+        print(f"⚠️ Dork sets differ: {len(raw[3] - packed[3]):,} missing, "
+              f"{len(packed[3] - raw[3]):,} extra")
+
+def main():
+    parser = argparse.ArgumentParser(description='🗜️ Pack corpus files into compressed, line-oriented shards')
+    parser.add_argument('--data-dir', default='data', help='Raw corpus directory (default: data)')
+    parser.add_argument('--output', '-o', default='data_packed', help='Shard directory (default: data_packed)')
+    parser.add_argument('--codec', choices=CODECS, default='gz', help='Compression codec (default: gz)')
+    parser.add_argument('--level', type=int, help='Compression level (default: codec default)')
+    parser.add_argument('--shard-size', type=parse_size, default=DEFAULT_SHARD_SIZE, metavar='SIZE',
+                        help='Uncompressed bytes per shard (default: 64M)')
+    parser.add_argument('--no-report', action='store_true', help='Skip the raw vs packed comparison')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        shards = pack_corpus(args.data_dir, args.output, args.codec, args.shard_size, args.level)
+        size = sum(os.path.getsize(path) for path in shards)
+        print(f"✓ Packed {args.data_dir} into {len(shards)} {args.codec} shards "
+              f"({size / (1024 * 1024):,.1f} MB) in {time.perf_counter() - start:.2f}s")
+        print(f"💾 Saved to {args.output}/ (use: python main.py \"query\" --data-dir {args.output})")
+
+        if not args.no_report:
+            print_layout_report(args.data_dir, args.output, args.codec)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Pre-fork serving for the Dork Generator
+- Parent loads the corpus once and packs it into one shared memory map
+- Forked workers answer generate_dorks calls without per-worker copies
+- Reports per-worker RSS against shared memory for host sizing
+"""
+
+import os
+import sys
+import gc
+import re
+import json
+import mmap
+import time
+import array
+import bisect
+import argparse
+import multiprocessing
+from collections import defaultdict
+
+from dork_generator import DorkGenerator, CorpusSnapshot, singular_token, word_weight
+
+def _align(offset, size=8):
+    """Round offset up to a multiple of size"""
+    return (offset + size - 1) // size * size
+
+class SharedFlatIndex:
+    """Inner-product search over embeddings stored in the shared map
+
+    Mirrors the ``search`` call of faiss.IndexFlatIP so the generator's
+    semantic search runs unchanged on top of it.
+    """
+
+    def __init__(self, buffer, offset, count, dim):
+        import numpy as np
+        self.np = np
+        self.vectors = np.frombuffer(buffer, dtype='float32', count=count * dim,
+                                     offset=offset).reshape(count, dim)
+
+    def search(self, queries, k):
+        np = self.np
+        k = min(k, len(self.vectors))
+        scores = queries @ self.vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        rows = np.arange(len(queries))[:, None]
+        order = np.argsort(-scores[rows, top], axis=1, kind='stable')
+        indices = top[rows, order]
+        return scores[rows, indices], indices
+
+class SharedCorpus:
+    """Read-only, memory-mapped corpus shared by all forked workers
+
+    Layout of the anonymous map: the UTF-8 dorks joined by newlines, their
+    offsets, the lowercased dorks with their own offsets, and (optionally)
+    the float32 embedding matrix. It behaves as a sequence of dorks, and
+    keyword scoring runs ``mmap.find`` over the lowercased section instead
+    of touching Python objects, so workers never copy the pages.
+    """
+
+    def __init__(self, dorks, vectors=None):
+        raw = '\n'.join(dorks).encode('utf-8')
+        lower = '\n'.join(d.lower() for d in dorks).encode('utf-8')
+        raw_offsets = self._offsets(dorks, str)
+        lower_offsets = self._offsets(dorks, str.lower)
+
+        self.count = len(dorks)
+        self.dim = vectors.shape[1] if vectors is not None else 0
+
+        layout = [('raw', raw), ('raw_offsets', raw_offsets.tobytes()),
+                  ('lower', lower), ('lower_offsets', lower_offsets.tobytes())]
+        if vectors is not None:
+            layout.append(('vectors', vectors.astype('float32').tobytes()))
+
+        self.sections = {}
+        size = 0
+        for name, data in layout:
+            size = _align(size)
+            self.sections[name] = (size, len(data))
+            size += len(data)
+
+        self.size = max(size, 1)
+        self.buffer = mmap.mmap(-1, self.size)
+        for name, data in layout:
+            start, length = self.sections[name]
+            self.buffer[start:start + length] = data
+
+        self.index = None
+        if vectors is not None:
+            start, _ = self.sections['vectors']
+            self.index = SharedFlatIndex(self.buffer, start, self.count, self.dim)
+
+        view = memoryview(self.buffer)
+        self.raw_offsets = self._section(view, 'raw_offsets').cast('Q')
+        self.lower_offsets = self._section(view, 'lower_offsets').cast('Q')
+
+    @staticmethod
+    def _offsets(dorks, transform):
+        """Byte offset of each dork in the newline-joined blob (plus the end)"""
+        offsets = array.array('Q', [0])
+        position = 0
+        for dork in dorks:
+            position += len(transform(dork).encode('utf-8')) + 1
+            offsets.append(position)
+        return offsets
+
+    def _section(self, view, name):
+        start, length = self.sections[name]
+        return view[start:start + length]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.count
+        if not 0 <= idx < self.count:
+            raise IndexError(idx)
+        start = self.sections['raw'][0]
+        begin = start + self.raw_offsets[idx]
+        end = start + self.raw_offsets[idx + 1] - 1
+        return self.buffer[begin:end].decode('utf-8')
+
+    def _lower(self, idx):
+        """Lowercased text of one dork"""
+        start = self.sections['lower'][0]
+        return self.buffer[start + self.lower_offsets[idx]:start + self.lower_offsets[idx + 1] - 1].decode('utf-8')
+
+    def _containing_word(self, word):
+        """Indices of dorks holding word as a whole token, like keyword_index postings"""
+        pattern = re.compile(r'\b' + re.escape(word) + r'\b')
+        return [idx for idx in self._containing(word.encode('utf-8')) if pattern.search(self._lower(idx))]
+
+    def _containing(self, needle):
+        """Indices of dorks whose lowercased text contains needle"""
+        if not needle:
+            return range(self.count)
+        if b'\n' in needle:
+            return []
+
+        base, length = self.sections['lower']
+        end = base + length
+        found = []
+        position = self.buffer.find(needle, base, end)
+        while position != -1:
+            idx = bisect.bisect_right(self.lower_offsets, position - base) - 1
+            found.append(idx)
+            # Skip to the next dork so each one is counted once
+            position = self.buffer.find(needle, base + self.lower_offsets[idx + 1], end)
+        return found
+
+    def keyword_scores(self, query, expansions=()):
+        """Same scoring as DorkGenerator._keyword_scores, straight off the map
+
+        Expansion terms are checked as whole tokens on their substring hits,
+        matching the keyword_index postings the regular generator uses.
+        """
+        query_lower = query.lower()
+        words = {w for w in re.findall(r'\b\w+\b', query_lower) if len(w) > 2}
+
+        scores = defaultdict(int)
+        for word in words:
+            hits = set(self._containing(word.encode('utf-8')))
+            singular = singular_token(word)
+            if singular:
+                hits.update(self._containing_word(singular))
+            weight = word_weight(len(hits), self.count)
+            for idx in hits:
+                scores[idx] += weight
+        for idx in self._containing(query_lower.encode('utf-8')):
+            scores[idx] += 50
+        for term, weight in expansions:
+            for idx in self._containing_word(term):
+                scores[idx] += weight
+        return scores
+
+class SharedDorkGenerator(DorkGenerator):
+    """DorkGenerator view over a SharedCorpus, built inside each worker"""
+
+    def __init__(self, shared, model=None, stats=None, taxonomy=None, cooccurrence=None,
+                 data_dir="data", tuning=None):
+        self._init_state(data_dir, use_ai=model is not None, tuning=tuning, taxonomy=taxonomy)
+        self.model = model if shared.index is not None else None
+        self.shared = shared
+        self.index = shared.index
+        self.ghdb_dorks = shared
+        self.stats = stats
+        self.cooccurrence = cooccurrence or {}
+
+    def _snapshot(self):
+        return CorpusSnapshot(self.shared, None, None, self.index, None, self._generation)
+
+    def _keyword_scores(self, query, snapshot):
+        words = {w for w in re.findall(r'\b\w+\b', query.lower()) if len(w) > 2}
+        return snapshot.dorks.keyword_scores(query, self._expand_query(words))
+
+    def reload(self):
+        raise RuntimeError("Pre-fork workers cannot reload; reload the parent and restart the pool instead")
+
+def check_parity(generator, shared, queries, top_k=30):
+    """Check workers rank like the regular generator; return mismatched queries"""
+    worker = SharedDorkGenerator(shared, generator.model, generator.stats, generator.taxonomy,
+                                 generator.cooccurrence, generator.data_dir, generator.tuning)
+    mismatched = [query for query in queries
+                  if worker.find_relevant_dorks(query, top_k) != generator.find_relevant_dorks(query, top_k)]
+    if mismatched:
+        print(f"⚠️ Workers rank {len(mismatched)}/{len(queries)} queries differently, "
+              f"e.g. {mismatched[0]!r}")
+    else:
+        print(f"✓ Workers match the regular generator on {len(queries)} queries")
+    return mismatched
+
+def read_memory():
+    """Memory of the current process in kB: rss, pss, shared, private"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':'):
+                    usage[parts[0][:-1]] = int(parts[1])
+        return {
+            'rss': usage.get('Rss', 0),
+            'pss': usage.get('Pss', 0),
+            'shared': usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0),
+            'private': usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+        }
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss': rss, 'pss': None, 'shared': None, 'private': None}
+
+# State inherited by forked workers
+_parent_state = {}
+_worker_generator = None
+
+def _init_worker():
+    """Build the worker's generator over the inherited shared corpus"""
+    global _worker_generator
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except Exception:
+        pass
+    _worker_generator = SharedDorkGenerator(_parent_state['shared'], _parent_state['model'],
+                                            _parent_state['stats'], _parent_state['taxonomy'],
+                                            _parent_state['cooccurrence'], _parent_state['data_dir'],
+                                            _parent_state['tuning'])
+
+def _serve(task):
+    query, count = task
+    results = _worker_generator.generate_dorks(query, count=count)
+    return {
+        'query': query,
+        'components': results['components'],
+        'relevant_dorks': results['relevant_dorks'],
+        'generated_dorks': results['generated_dorks']
+    }
+
+def _report(_):
+    # Every worker must take exactly one report task
+    _parent_state['barrier'].wait(timeout=30)
+    return os.getpid(), read_memory()
+
+class PreforkPool:
+    """Load the corpus once in the parent, then fork workers that share it"""
+
+    def __init__(self, workers=None, data_dir="data", use_ai=False, ingest_buffer=None,
+                 verify_queries=()):
+        self.workers = workers or os.cpu_count() or 1
+
+        generator = DorkGenerator(data_dir=data_dir, use_ai=use_ai, ingest_buffer=ingest_buffer)
+
+        vectors = None
+        if generator.model and generator.index is not None:
+            vectors = generator.index.reconstruct_n(0, generator.index.ntotal)
+
+        print(f"🧩 Packing {len(generator.ghdb_dorks):,} dorks into shared memory...")
+        self.shared = SharedCorpus(generator.ghdb_dorks, vectors)
+        print(f"✓ Shared segment: {self.shared.size / (1024 * 1024):.1f} MB")
+
+        if verify_queries:
+            check_parity(generator, self.shared, verify_queries)
+
+        _parent_state.update({
+            'shared': self.shared,
+            'model': generator.model,
+            'stats': generator.get_dork_statistics(),
+            'taxonomy': generator.taxonomy,
+            'cooccurrence': generator.cooccurrence,
+            'data_dir': data_dir,
+            'tuning': generator.tuning,
+            'barrier': multiprocessing.get_context('fork').Barrier(self.workers)
+        })
+
+        # Drop the per-object corpus before forking and freeze what is left,
+        # so the GC in the workers does not dirty (and copy) inherited pages
+        del generator, vectors
+        gc.collect()
+        gc.freeze()
+
+        print(f"🍴 Forking {self.workers} workers...")
+        context = multiprocessing.get_context('fork')
+        self.pool = context.Pool(self.workers, initializer=_init_worker)
+
+    def generate_many(self, queries, count=20):
+        """Answer generate_dorks for every query across the workers"""
+        tasks = [(query, count) for query in queries]
+        return self.pool.map(_serve, tasks, chunksize=max(1, len(tasks) // (self.workers * 4)))
+
+    def memory_report(self):
+        """Per-worker memory, plus the parent and the shared segment size"""
+        workers = self.pool.map(_report, range(self.workers), chunksize=1)
+        return {
+            'shared_segment_kb': self.shared.size // 1024,
+            'parent': read_memory(),
+            'workers': dict(workers)
+        }
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def print_memory_report(report):
+    """Print the memory report as a table"""
+    def fmt(kb):
+        return f"{kb / 1024:8.1f}" if kb is not None else "     n/a"
+
+    print(f"\n{'='*60}")
+    print(f"🧠 MEMORY REPORT (MB)")
+    print(f"{'='*60}")
+    print(f"Shared corpus segment: {report['shared_segment_kb'] / 1024:.1f} MB")
+    print(f"")
+    print(f"{'process':>12} {'RSS':>8} {'PSS':>8} {'shared':>8} {'private':>8}")
+    parent = report['parent']
+    print(f"{'parent':>12} {fmt(parent['rss'])} {fmt(parent['pss'])} {fmt(parent['shared'])} {fmt(parent['private'])}")
+    for pid, mem in sorted(report['workers'].items()):
+        print(f"{pid:>12} {fmt(mem['rss'])} {fmt(mem['pss'])} {fmt(mem['shared'])} {fmt(mem['private'])}")
+
+    private = [m['private'] for m in report['workers'].values() if m['private'] is not None]
+    if private:
+        print(f"")
+        print(f"Per-worker private: ~{sum(private) / len(private) / 1024:.1f} MB "
+              f"(size hosts as parent RSS + workers x private)")
+
+def main():
+    parser = argparse.ArgumentParser(description='🍴 Serve dork queries from pre-forked workers')
+    parser.add_argument('queries', help='File with one query per line ("-" for stdin)')
+    parser.add_argument('--workers', '-w', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--count', '-c', type=int, default=20, help='Dorks per query (default: 20)')
+    parser.add_argument('--fast', '-f', action='store_true', help='Use fast mode (no AI, keyword-only)')
+    parser.add_argument('--output', '-o', help='Write results as JSON lines to this file')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check workers return the same top 30 as a regular generator first')
+    args = parser.parse_args()
+
+    if args.queries == '-':
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+    else:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    with PreforkPool(workers=args.workers, use_ai=not args.fast,
+                     verify_queries=queries if args.verify else ()) as pool:
+        start = time.time()
+        results = pool.generate_many(queries, count=args.count)
+        elapsed = time.time() - start
+
+        print(f"\n✓ Answered {len(results):,} queries in {elapsed:.2f}s "
+              f"({len(results) / max(elapsed, 1e-9):,.1f} queries/s)")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps(result) + '\n')
+            print(f"💾 Saved to {args.output}")
+
+        print_memory_report(pool.memory_report())
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
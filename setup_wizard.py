@@ -7,6 +7,33 @@ Helps install dependencies and models with better error handling
 import sys
 import subprocess
 import os
+import io
+import json
+import time
+import shutil
+import tempfile
+import contextlib
+import statistics
+
+# Benchmark sizing: keep the whole calibration to well under a minute
+SAMPLE_BYTES = 2 * 1024 * 1024
+SAMPLE_MIN_BYTES_PER_FILE = 32 * 1024
+EMBED_SAMPLE = 512
+BATCH_SIZES = [16, 32, 64, 128]
+BENCH_QUERIES = [
+    "find wordpress config files",
+    "sql database backups",
+    "admin login pages",
+    "exposed api keys"
+]
+# Enable semantic mode only if embedding the full corpus fits this budget
+SEMANTIC_BUDGET_SECONDS = 300
+# Prefer the approximate index only when it beats flat search by this factor
+ANN_SPEEDUP = 2.0
+# Cap on synthetic vectors used to time FAISS search
+MAX_BENCH_VECTORS = 200000
+# Query batch sizes timed against the sparse TF-IDF backend
+TFIDF_BATCHES = [1, 100, 10000]
 
 def run_command(cmd, description):
     """Run a command and handle errors gracefully"""
@@ -100,33 +127,273 @@ def install_dependencies(mode='full'):
     
     return True
 
+def _median_ms(func, repeat=5):
+    """Median wall time of func() in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def _build_sample(data_dir, sample_dir):
+    """Copy lines from across the corpus into sample_dir; return (sample, total) bytes
+    
+    Both counts are decompressed bytes, so compressed shards are streamed to
+    the end to size them. The sample budget is split over evenly spaced
+    files instead of being spent on the head of the first one.
+    """
+    from dork_generator import COMPRESSED_SUFFIXES, find_corpus_files, open_corpus_file
+    
+    files = sorted(find_corpus_files(data_dir))
+    if not files:
+        return 0, 0
+    per_file = max(SAMPLE_BYTES // len(files), SAMPLE_MIN_BYTES_PER_FILE)
+    picks = min(len(files), SAMPLE_BYTES // per_file)
+    sampled = {i * len(files) // picks for i in range(picks)}
+    copied = 0
+    total = 0
+    
+    for i, path in enumerate(files):
+        compressed = path.endswith(COMPRESSED_SUFFIXES)
+        if not compressed:
+            total += os.path.getsize(path)
+            if i not in sampled:
+                continue
+        
+        with open_corpus_file(path) as f:
+            if i in sampled:
+                # Whole lines only, so no dork is truncated
+                lines = []
+                size = 0
+                for line in f:
+                    line = line.encode('utf-8')
+                    if size + len(line) > per_file:
+                        size += len(line)
+                        break
+                    lines.append(line)
+                    size += len(line)
+                chunk = b''.join(lines)
+                with open(os.path.join(sample_dir, f"sample_{i}.txt"), 'wb') as out:
+                    out.write(chunk)
+                copied += len(chunk)
+                if compressed:
+                    total += size
+            if compressed:
+                for block in iter(lambda: f.read(1024 * 1024), ''):
+                    total += len(block.encode('utf-8'))
+    
+    return copied, total
+
+def benchmark_ingest_and_search(data_dir="data"):
+    """Time ingest and keyword search on a corpus sample"""
+    from dork_generator import DorkGenerator
+    
+    sample_dir = tempfile.mkdtemp(prefix='dork_bench_')
+    try:
+        sample_bytes, total_bytes = _build_sample(data_dir, sample_dir)
+        if not sample_bytes:
+            return None
+        
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            gen = DorkGenerator(data_dir=sample_dir, use_ai=False)
+        ingest_s = time.perf_counter() - start
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            query_ms = statistics.median(
+                _median_ms(lambda q=q: gen.find_relevant_dorks(q, top_k=20)) for q in BENCH_QUERIES
+            )
+        
+        # Keyword search is a linear scan, so scale latency by corpus size
+        scale = total_bytes / sample_bytes
+        return {
+            'sample_bytes': sample_bytes,
+            'corpus_bytes': total_bytes,
+            'sample_dorks': len(gen.ghdb_dorks),
+            'estimated_dorks': int(len(gen.ghdb_dorks) * scale),
+            'ingest_mb_per_s': sample_bytes / (1024 * 1024) / ingest_s,
+            'ingest_dorks_per_s': len(gen.ghdb_dorks) / ingest_s,
+            'keyword_query_ms_sample': query_ms,
+            'keyword_query_ms_projected': query_ms * scale,
+            'sample': list(gen.ghdb_dorks)
+        }
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+
+def benchmark_embeddings(sample):
+    """Embedding throughput for each batch size and thread count"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        import torch
+    except Exception as e:
+        print(f"   ⚡ Embeddings skipped: {e}")
+        return None
+    
+    from dork_generator import set_thread_count
+    
+    with contextlib.redirect_stderr(io.StringIO()):
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+    sample = sample or BENCH_QUERIES
+    texts = (sample * (EMBED_SAMPLE // len(sample) + 1))[:EMBED_SAMPLE]
+    
+    cpus = os.cpu_count() or 1
+    thread_counts = sorted({1, max(1, cpus // 2), cpus})
+    default_threads = torch.get_num_threads()
+    
+    results = []
+    model.encode(texts[:32], batch_size=32)  # warm-up
+    for threads in thread_counts:
+        set_thread_count(threads)
+        for batch_size in BATCH_SIZES:
+            start = time.perf_counter()
+            model.encode(texts, batch_size=batch_size)
+            rate = len(texts) / (time.perf_counter() - start)
+            results.append({'threads': threads, 'batch_size': batch_size, 'dorks_per_s': rate})
+            print(f"   • threads={threads:<3} batch={batch_size:<4} {rate:,.0f} dorks/s")
+    
+    set_thread_count(default_threads)
+    embeddings = model.encode(texts[:min(len(texts), 256)], batch_size=64)
+    return {'runs': results, 'best': max(results, key=lambda r: r['dorks_per_s']),
+            'dim': embeddings.shape[1]}
+
+def benchmark_vector_search(count, dim):
+    """Flat vs HNSW FAISS search latency at the projected corpus size"""
+    try:
+        import faiss
+        import numpy as np
+    except Exception as e:
+        print(f"   ⚡ FAISS search skipped: {e}")
+        return None
+    
+    from dork_generator import build_vector_index
+    
+    count = max(1000, min(count, MAX_BENCH_VECTORS))
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dim)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, count, 16)]
+    
+    results = {'vectors': count}
+    for index_type in ('flat', 'hnsw'):
+        start = time.perf_counter()
+        index = build_vector_index(vectors, index_type)
+        build_s = time.perf_counter() - start
+        search_ms = _median_ms(lambda: index.search(queries, 40)) / len(queries)
+        results[index_type] = {'build_s': build_s, 'search_ms': search_ms}
+        print(f"   • {index_type:<5} build {build_s:6.2f}s, search {search_ms:7.3f} ms/query")
+    return results
+
+def benchmark_tfidf(sample):
+    """Queries/s of the sparse TF-IDF backend for several batch sizes"""
+    from dork_generator import TfidfRanker
+    
+    try:
+        start = time.perf_counter()
+        ranker = TfidfRanker.fit(sample)
+        fit_s = time.perf_counter() - start
+    except Exception as e:
+        print(f"   ⚡ TF-IDF skipped: {e}")
+        return None
+    
+    print(f"   • fit {len(sample):,} dorks in {fit_s:.2f}s "
+          f"({ranker.matrix.shape[1]:,} features)")
+    pool = BENCH_QUERIES + sample
+    results = {'fit_s': fit_s, 'features': ranker.matrix.shape[1], 'batches': {}}
+    for size in TFIDF_BATCHES:
+        queries = (pool * (size // len(pool) + 1))[:size]
+        start = time.perf_counter()
+        ranker.top_k_batch(queries, 20)
+        rate = size / (time.perf_counter() - start)
+        results['batches'][size] = rate
+        print(f"   • batch={size:<6} {rate:,.0f} queries/s")
+    return results
+
+def choose_tuning(ingest, embed, vector):
+    """Turn benchmark numbers into a tuning config"""
+    from dork_generator import DEFAULT_TUNING
+    
+    tuning = dict(DEFAULT_TUNING)
+    
+    # Embeddings not measured (e.g. AI deps not installed yet): keep the default,
+    # so semantic search turns on once they are installed
+    if embed is not None:
+        best = embed['best']
+        tuning['batch_size'] = best['batch_size']
+        tuning['threads'] = best['threads']
+        estimated = ingest['estimated_dorks'] if ingest else 0
+        if estimated / best['dorks_per_s'] > SEMANTIC_BUDGET_SECONDS:
+            tuning['semantic'] = False
+    
+    if vector:
+        flat_ms = vector['flat']['search_ms']
+        hnsw_ms = vector['hnsw']['search_ms']
+        tuning['index_type'] = 'hnsw' if flat_ms >= ANN_SPEEDUP * hnsw_ms else 'flat'
+    
+    return tuning
+
+def run_benchmark(data_dir="data"):
+    """Calibrate this machine on a corpus sample and write the tuning file"""
+    from dork_generator import TUNING_FILE_NAME
+    
+    print(f"\n2️⃣ Benchmarking ingest and keyword search...")
+    ingest = benchmark_ingest_and_search(data_dir)
+    if ingest:
+        print(f"   ✓ Ingest: {ingest['ingest_mb_per_s']:.1f} MB/s "
+              f"({ingest['ingest_dorks_per_s']:,.0f} dorks/s)")
+        print(f"   ✓ Keyword query: {ingest['keyword_query_ms_sample']:.1f} ms on sample, "
+              f"~{ingest['keyword_query_ms_projected']:.0f} ms projected "
+              f"for ~{ingest['estimated_dorks']:,} dorks")
+    else:
+        print(f"   ⚠️ No corpus files found in {data_dir}/")
+    
+    tfidf = None
+    if ingest:
+        print(f"\n3️⃣ Benchmarking sparse TF-IDF ranking...")
+        tfidf = benchmark_tfidf(ingest['sample'])
+    
+    print(f"\n4️⃣ Benchmarking embedding throughput...")
+    embed = benchmark_embeddings(ingest['sample'] if ingest else [])
+    
+    vector = None
+    if embed:
+        print(f"\n5️⃣ Benchmarking vector search...")
+        vector = benchmark_vector_search(ingest['estimated_dorks'] if ingest else 0, embed['dim'])
+    
+    tuning = choose_tuning(ingest, embed, vector)
+    if ingest:
+        ingest.pop('sample')
+    config = dict(tuning)
+    config['benchmark'] = {
+        'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'cpus': os.cpu_count(),
+        'ingest': ingest,
+        'tfidf': tfidf,
+        'embeddings': embed,
+        'vector_search': vector
+    }
+    
+    path = os.path.join(data_dir, TUNING_FILE_NAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    
+    print(f"\n💾 Tuned config written to {path}")
+    print(f"   batch_size={tuning['batch_size']}, threads={tuning['threads']}, "
+          f"index_type={tuning['index_type']}, semantic={tuning['semantic']}")
+    return tuning
+
 def verify_installation():
-    """Verify the installation works"""
+    """Verify the installation works and tune it for this machine"""
     print(f"\n{'='*60}")
     print(f"🧪 Verifying installation...")
     print(f"{'='*60}")
     
     try:
         print(f"\n1️⃣ Testing basic import...")
-        from dork_generator import DorkGenerator
+        import dork_generator
         print(f"   ✓ Core module loaded")
         
-        print(f"\n2️⃣ Testing fast mode (no AI)...")
-        gen = DorkGenerator(use_ai=False)
-        print(f"   ✓ Fast mode works!")
-        print(f"   ✓ Loaded {len(gen.ghdb_dorks):,} dorks")
-        
-        print(f"\n3️⃣ Testing AI mode...")
-        try:
-            gen_ai = DorkGenerator(use_ai=True)
-            if gen_ai.model:
-                print(f"   ✓ AI mode fully functional")
-            else:
-                print(f"   ⚡ AI libraries not available, using fast mode")
-                print(f"      (This is fine! Fast mode still works great)")
-        except Exception as e:
-            print(f"   ⚡ AI mode not available: {e}")
-            print(f"      (This is fine! Fast mode still works great)")
+        run_benchmark()
         
         print(f"\n✅ Installation verified successfully!")
         return True